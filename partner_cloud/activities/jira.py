@@ -18,8 +18,10 @@
 """Logic for jira related activities."""
 
 from collections import defaultdict
-from typing import Dict, DefaultDict, List, Optional, Set, TypeVar
-import ipaddress
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, DefaultDict, FrozenSet, Iterator, List, Optional, Sequence, Set, TypeVar
+import functools
+import itertools
 
 from temporalio import activity, workflow
 
@@ -38,6 +40,7 @@ with workflow.unsafe.imports_passed_through():
 
 
 T = TypeVar("T", OpenStackProject, InfraNode, Resource)
+S = TypeVar("S")
 
 LOG = logging.getLogger(__name__)
 CONF = partner_cloud.conf.CONF
@@ -46,6 +49,11 @@ CONF = partner_cloud.conf.CONF
 # at the application or infrastructure layer.
 FIELD_INTEGRATION_LAYER = "customfield_10579"
 
+# The integration levels which may be set in the integration layer field.
+INTEGRATION_INFRASTRUCTURE = "Infrastructure"
+INTEGRATION_PLATFORM = "Platform"
+INTEGRATION_APPLICATION = "Application"
+
 # The field that determines which cloud this task is scheduled for
 FIELD_PARTNER_CLOUD_NAME = "customfield_10580"
 
@@ -58,6 +66,45 @@ FIELD_ASSIGNEE = "assignee"
 # The field for the status of a Jira ticket.
 FIELD_STATUS = "status"
 
+# The field for the links between Jira tickets.
+FIELD_ISSUE_LINKS = "issuelinks"
+
+# The fields read when determining access for the issues in a sprint. Only these
+# are requested from Jira rather than every field of every issue.
+SPRINT_ISSUE_FIELDS = [
+    FIELD_STATUS,
+    FIELD_ISSUE_LINKS,
+    FIELD_INTEGRATION_LAYER,
+    FIELD_PARTNER_CLOUD_NAME,
+    FIELD_COLLABORATORS,
+    FIELD_ASSIGNEE,
+]
+
+# The attribute used to cache whether an Issue is completed on the Issue itself.
+_ATTR_IS_COMPLETED = "_pc_is_completed"
+
+# The maximum number of issue keys to include in a single JQL query.
+MAX_KEYS_PER_QUERY = 100
+
+# The maximum number of JQL queries to run concurrently.
+MAX_QUERY_WORKERS = 5
+
+
+def _chunks(seq: Sequence[S], size: int) -> Iterator[Sequence[S]]:
+    """Yields successive chunks of the sequence with at most size items."""
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+@functools.lru_cache(maxsize=1)
+def _get_current_sprint_jql(project: str) -> str:
+    """Returns the JQL query for the issues scheduled into the project's current sprint.
+
+    :param project: the Jira project to query
+    :return: the JQL query for the current sprint.
+    """
+    return f'Project = "{project}" AND sprint in openSprints()'
+
 
 class JiraClient:
 
@@ -66,25 +113,46 @@ class JiraClient:
 
     def get_issues_for_current_sprint(self, cloud: Optional[str] = None):
         """Retrieves the issues scheduled into the current sprint."""
-        jql = f'Project = "{CONF.jira.project}" AND sprint in openSprints()'
+        jql = _get_current_sprint_jql(CONF.jira.project)
         if cloud:
-            jql += f' AND "Partner Cloud name" = "{cloud}"'
-        return self.client.search_issues(jql)
+            jql = f'{jql} AND "Partner Cloud name" = "{cloud}"'
+        return self.client.search_issues(jql, fields=SPRINT_ISSUE_FIELDS, maxResults=False)
+
+    def get_issues_by_keys(self, *issue_keys: str) -> List[Issue]:
+        """Retrieves the issues by the specified keys.
 
-    def get_issues_by_keys(self, *issue_keys: str):
-        """Retrieves the issues by the specified keys."""
-        keys = ", ".join(issue_keys)
-        return self.client.search_issues(
-            f'Project = "{CONF.jira.project}" AND IssueKey in ({keys})'
-        )
+        Jira rejects overly long JQL queries, so the keys are split into chunks
+        which are queried concurrently.
+        """
+        def search(keys: Sequence[str]) -> List[Issue]:
+            return self.client.search_issues(
+                f'Project = "{CONF.jira.project}" AND IssueKey in ({", ".join(keys)})',
+                fields=[FIELD_STATUS],
+                maxResults=False,
+            )
+
+        chunks = list(_chunks(issue_keys, MAX_KEYS_PER_QUERY))
+        if len(chunks) <= 1:
+            return list(itertools.chain.from_iterable(map(search, chunks)))
+
+        with ThreadPoolExecutor(max_workers=MAX_QUERY_WORKERS) as executor:
+            return list(itertools.chain.from_iterable(executor.map(search, chunks)))
 
     def is_issue_completed(self, issue: Issue) -> bool:  # noqa
         """Return True if the issue status indicates it is completed.
 
+        The result is cached on the issue so that checking an issue more than
+        once does not read its status again.
+
         :param issue: the Issue to check the status of
         :return: True if the issue is completed, False otherwise.
         """
-        return issue.get_field(FIELD_STATUS).name == "Done"
+        if (completed := issue.__dict__.get(_ATTR_IS_COMPLETED)) is not None:
+            return completed
+
+        completed = issue.get_field(FIELD_STATUS).name == "Done"
+        issue.__dict__[_ATTR_IS_COMPLETED] = completed
+        return completed
 
     def assign_issue(self, issue: Issue, user: User) -> bool:
         """Assigns the issue specified to the user specified.
@@ -97,21 +165,16 @@ class JiraClient:
             raise ValueError("User provided must have an email address")
         return self.client.assign_issue(issue.key, user.email)
 
-    def get_pending_prerequisite_issues(self, issue: Issue) -> Optional[List[str]]:
-        """Returns the set of jira Issues that are pre-requisites for the given task.
-
-        Examines the Jira task and returns a list of issue keys which have not yet
-        completed but are required to start the activity. For example, a user requiring
-        a project on an OpenStack cloud must have the deployment task completed first
-        before the activity task can start.
+    def get_prerequisite_issue_keys(self, issue: Issue) -> List[str]:
+        """Returns the keys of the jira Issues that are pre-requisites for the given task.
 
         :param issue: the jira issue
-        :return: a list of issue keys that have yet to complete but are required
-                 to complete.
+        :return: a list of issue keys that are required to complete before the
+                 given issue can start.
         """
-        # If there are no issues linked, then simply return None
-        if not hasattr(issue.fields, "issuelinks"):
-            return None
+        # If there are no issues linked, then there are no pre-requisites
+        if not hasattr(issue.fields, FIELD_ISSUE_LINKS):
+            return []
 
         prerequisite_issues = []
         for link in issue.fields.issuelinks:
@@ -127,20 +190,53 @@ class JiraClient:
 
             prerequisite_issues.append(link.inwardIssue.key)
 
-        if not prerequisite_issues:
-            return None
+        return prerequisite_issues
+
+    def get_pending_prerequisite_issues(self, *issues: Issue) -> Dict[str, List[str]]:
+        """Returns the jira Issues that are pending pre-requisites for the given tasks.
+
+        Examines the Jira tasks and returns, for each task, a list of issue keys which
+        have not yet completed but are required to start the activity. For example, a
+        user requiring a project on an OpenStack cloud must have the deployment task
+        completed first before the activity task can start.
+
+        The pre-requisites of all the tasks are retrieved in a single query.
+
+        :param issues: the jira issues
+        :return: a mapping of issue key to the list of issue keys that have yet to
+                 complete but are required to complete. Issues without pending
+                 pre-requisites are not included.
+        """
+        all_prereqs = {issue.key: self.get_prerequisite_issue_keys(issue) for issue in issues}
+        flat = sorted({key for keys in all_prereqs.values() for key in keys})
+        if not flat:
+            return {}
+
+        tasks = {task.key: task for task in self.get_issues_by_keys(*flat)}
 
-        pending = []
-        for task in self.get_issues_by_keys(*prerequisite_issues):
-            if not self.is_issue_completed(task):
-                pending.append(task.key)
+        pending_map = {}
+        for issue_key, prereqs in all_prereqs.items():
+            pending = [key for key in prereqs
+                       if key in tasks and not self.is_issue_completed(tasks[key])]
+            if pending:
+                pending_map[issue_key] = pending
 
-        return pending
+        return pending_map
+
+
+# Shared empty set of users, immutable so it is safe to share between resources.
+_EMPTY_USERS: FrozenSet[User] = frozenset()
 
 
 def convert_user(user: JiraUser) -> User:
     """Converts a JiraUser to a PartnerCloud User."""
-    return User(name=user.displayName, email=user.emailAddress)
+    return _make_user(user.displayName, user.emailAddress)
+
+
+@functools.lru_cache(maxsize=1024)
+def _make_user(name: str, email: Optional[str]) -> User:
+    """Creates a User, reusing it when the same Jira user is on several issues."""
+    return User(name=name, email=email)
 
 
 class AccessResult(Object):
@@ -151,22 +247,107 @@ class AccessResult(Object):
     @staticmethod
     def from_map(data: Dict[T, Set[User]]) -> 'AccessResult':
         """Creates an AccessResult from a map."""
-        resources = []
-        user_map: Dict[str, Set[User]] = {}
-        for resource, users in data.items():
-            resources.append(resource)
-            user_map[resource.name] = users
+        resources = list(data.keys())
+        user_map = {resource.name: users for resource, users in data.items()}
 
         return AccessResult(resources=resources, users=user_map)
 
     def to_map(self) -> Dict[T, Set[User]]:
         """Converts to a mapping of resource -> set(users).
+
+        Resources without any users are mapped to an empty, immutable set.
         """
-        mapping: Dict[T, Set[User]] = {}
-        for resource in self.resources:
-            mapping[resource] = self.users.get(resource.name, set())
+        return {resource: self.users.get(resource.name, _EMPTY_USERS)
+                for resource in self.resources}
+
 
-        return mapping
+@functools.lru_cache(maxsize=32)
+def _get_infra_node(cloud: str) -> InfraNode:
+    """Returns the infrastructure node for the cloud.
+
+    The configuration of a cloud does not change while running, so the node is
+    only created once per cloud.
+
+    :param cloud: the PartnerCloud to get the infra node for
+    :return: the InfraNode of the cloud.
+    """
+    return InfraNode(
+        name=f"{cloud}-infra-node",
+        ip_address=CONF.get(cloud).infra_node
+    )
+
+
+def _get_infrastructure_resource(issue: Issue, cloud: str) -> Optional[Resource]:
+    """Returns the resource for an issue requiring infrastructure access.
+
+    The completion of the task requires access to the infrastructure itself,
+    e.g. a deployment of a node needs to occur.
+    """
+    return _get_infra_node(cloud)
+
+
+def _get_platform_resource(issue: Issue, cloud: str) -> Optional[Resource]:
+    """Returns the resource for an issue requiring platform access.
+
+    The completion of this issue requires access to the platform, e.g. an
+    OpenStack project is required. A project is created based on the issue key
+    (e.g. PACLOUD-102) that allows to map back to the Jira ticket.
+    """
+    # TODO(wolsen) Determine how to determine which platform is deployed
+    #  in order to give the right resource.
+    return OpenStackProject(name=issue.key.lower(), cloud=cloud)
+
+
+def _get_application_resource(issue: Issue, cloud: str) -> Optional[Resource]:
+    """Returns the resource for an issue requiring application access.
+
+    Requires access to the application running on top of the platform, which
+    is not yet available.
+    """
+    LOG.warning("Task requires application access, but this is not yet available.")
+    return None
+
+
+# The functions returning the resource to grant access to for each integration level.
+INTEGRATION_RESOURCES = {
+    INTEGRATION_INFRASTRUCTURE: _get_infrastructure_resource,
+    INTEGRATION_PLATFORM: _get_platform_resource,
+    INTEGRATION_APPLICATION: _get_application_resource,
+}
+
+
+def _get_open_issues(jira: JiraClient, issues: List[Issue]) -> List[Issue]:
+    """Returns the issues which have not been completed yet.
+
+    :param jira: the JiraClient to check the issues with
+    :param issues: the issues to check
+    :return: the List of issues which are not completed.
+    """
+    open_issues = []
+    for issue in issues:
+        if jira.is_issue_completed(issue):
+            LOG.debug(f"Issue {issue.key} has already been completed. Skipping.")
+            continue
+        open_issues.append(issue)
+
+    return open_issues
+
+
+def _get_issue_users(issue: Issue) -> Set[User]:
+    """Returns the users working on the issue.
+
+    The users working on an issue are its collaborators and its assignee.
+
+    :param issue: the issue to get the users for
+    :return: the Set of users working on the issue.
+    """
+    get_field = issue.get_field
+    jira_users: List[JiraUser] = list(get_field(FIELD_COLLABORATORS) or ())
+    if assignee := get_field(FIELD_ASSIGNEE):
+        jira_users.append(assignee)
+    # Convert the Jira users to ProjectCloud users, the assignee is often
+    # also a collaborator so only keep one of each.
+    return {convert_user(user) for user in jira_users}
 
 
 @activity.defn
@@ -189,55 +370,35 @@ async def get_access_for_current_sprint(cloud: str) -> AccessResult:
 
         resource_map: DefaultDict[Resource, Set[User]] = defaultdict(set)
         LOG.info(f"Checking: {CONF.clouds}")
-        infra_node = InfraNode(
-            name=f"{cloud}-infra-node",
-            ip_address=ipaddress.ip_address(CONF.get(cloud).infra_node)
-        )
 
-        for issue in issues:
-            LOG.info(f"Checking issue {issue.key} for access requirements.")
-            if jira.is_issue_completed(issue):
-                LOG.debug(f"Issue has already been completed. Skipping.")
-                continue
+        open_issues = _get_open_issues(jira, issues)
+        pending_map = jira.get_pending_prerequisite_issues(*open_issues)
 
-            if pending_issues := jira.get_pending_prerequisite_issues(issue):
+        for issue in open_issues:
+            LOG.info(f"Checking issue {issue.key} for access requirements.")
+            if pending_issues := pending_map.get(issue.key):
                 LOG.info(f"Issue {issue.key} cannot start as it is awaiting the completion "
                          f"of issues: {' '.join(pending_issues)}. Not determining access.")
                 continue
 
-            integrations = issue.get_field(FIELD_INTEGRATION_LAYER) or []
-            jira_users: List[JiraUser] = issue.get_field(FIELD_COLLABORATORS) or []
-            jira_users.append(issue.get_field(FIELD_ASSIGNEE))
-            # Convert the Jira users to ProjectCloud users
-            users = [convert_user(user) for user in jira_users]
+            integrations = issue.get_field(FIELD_INTEGRATION_LAYER) or ()
+            users = _get_issue_users(issue)
 
             for integration in integrations:
-                if integration.value == "Infrastructure":
-                    # The completion of the task requires access to the infrastructure
-                    # itself, e.g. a deployment of a node needs to occur.
-                    LOG.debug(f"Adding users {users} to infra node {infra_node.name}")
-                    resource_map[infra_node].update(users)
-                elif integration.value == "Platform":
-                    # TODO(wolsen) Determine how to determine which platform is deployed
-                    #  in order to give the right resource.
-                    #
-                    # The completion of this issue requires access to the platform, e.g.
-                    # an OpenStack project is required. Create a project based on the
-                    # issue key (e.g. PACLOUD-102) that allows to map back to the Jira
-                    # ticket.
-                    project = OpenStackProject(name=issue.key.lower(), cloud=cloud)
-                    LOG.debug(f"Adding users {users} to project {project.name}")
-                    resource_map[project].update(users)
-                elif integration.value == "Application":
-                    # Requires access to the application running on top of the platform.
-                    LOG.warning(f"Task requires application access, but this is not yet available.")
-                    continue
-                else:
+                get_resource = INTEGRATION_RESOURCES.get(integration.value)
+                if get_resource is None:
                     # Unknown integration level
                     LOG.error(f"Unknown integration level {integration}, {type(integration)}. "
                               "Unable to grant access for users to resources of this type.")
                     continue
 
+                resource = get_resource(issue, cloud)
+                if resource is None:
+                    continue
+
+                LOG.debug(f"Adding users {users} to {resource.name}")
+                resource_map[resource].update(users)
+
         return AccessResult.from_map(resource_map)
     except JIRAError as e:
         LOG.exception("Failed to query issues from Jira.")
@@ -17,7 +17,11 @@
 
 """Launchpad based activities."""
 
-from typing import Iterable, List, Tuple, Union
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, List, Optional, Tuple, Union
 
 from launchpadlib.launchpad import Launchpad
 from launchpadlib.uris import lookup_service_root
@@ -37,6 +41,19 @@ CONF = partner_cloud.conf.CONF
 
 APPLICATION_NAME = "partner-cloud-access-tool"
 
+# The maximum number of launchpad users to check concurrently.
+MAX_CHECK_WORKERS = 8
+
+# The actions to take for a user when adding users to a group.
+ACTION_ADD = "add"
+ACTION_SKIP = "skip"
+ACTION_FAIL = "fail"
+
+# The membership statuses which indicate the user is an active member of a group.
+ACTIVE_MEMBER_STATUSES = frozenset(("Approved", "Administrator"))
+
+_thread_local = threading.local()
+
 
 class LaunchpadGroupChangeResult(Object):
     group: str
@@ -44,7 +61,7 @@ class LaunchpadGroupChangeResult(Object):
     failed: List[Tuple[Union[Group, User], str]] = []
 
     def has_failures(self):
-        return len(self.failed) == 0
+        return bool(self.failed)
 
     def add_success(self, user: User):
         self.success.append(user)
@@ -53,8 +70,8 @@ class LaunchpadGroupChangeResult(Object):
         self.failed.append((user, reason))
 
 
-def _get_launchpad_client() -> Launchpad:
-    """Returns the launchpad client.
+def _create_launchpad_client() -> Launchpad:
+    """Creates a new launchpad client.
 
     :return: the Launchpad client
     """
@@ -68,6 +85,50 @@ def _get_launchpad_client() -> Launchpad:
     return client
 
 
+@functools.lru_cache(maxsize=1)
+def _get_launchpad_client() -> Launchpad:
+    """Returns the launchpad client used by the activities.
+
+    The client is created once and reused for the lifetime of the process.
+
+    :return: the Launchpad client
+    """
+    return _create_launchpad_client()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_canonical_group():
+    """Returns the launchpad group for Canonical.
+
+    :return: the launchpad group for Canonical
+    """
+    return _get_launchpad_client().people["canonical"]
+
+
+@functools.lru_cache(maxsize=1)
+def _get_executor() -> ThreadPoolExecutor:
+    """Returns the thread pool used to check launchpad users concurrently.
+
+    :return: the ThreadPoolExecutor
+    """
+    return ThreadPoolExecutor(max_workers=MAX_CHECK_WORKERS, thread_name_prefix="launchpad")
+
+
+def _get_thread_launchpad_client() -> Launchpad:
+    """Returns the launchpad client for the current thread.
+
+    The http connection underlying a launchpad client is not thread safe, so
+    each thread checking users gets its own client.
+
+    :return: the Launchpad client
+    """
+    client = getattr(_thread_local, "client", None)
+    if client is None:
+        client = _thread_local.client = _create_launchpad_client()
+
+    return client
+
+
 def _check_memberships(lp_user, canonical_group, target_group) -> Tuple[bool, bool]:
     """Checks if the user is a canonical employee or already in the group.
 
@@ -80,26 +141,73 @@ def _check_memberships(lp_user, canonical_group, target_group) -> Tuple[bool, bo
     is_employee = False
     already_in_group = False
 
+    # Compare the teams by link, the groups may have been fetched by another client
+    # and comparing the entries themselves would also compare their etags.
+    canonical_link = canonical_group.self_link
+    target_link = target_group.self_link
+
     for membership in lp_user.memberships_details:
-        if membership.team == canonical_group:
+        if membership.team_link == canonical_link:
             is_employee = True
-            if already_in_group:
-                break
-            continue
-
-        if membership.team == target_group and membership.status in ("Approved", "Administrator"):
+        elif membership.team_link == target_link and membership.status in ACTIVE_MEMBER_STATUSES:
             already_in_group = True
-            if is_employee:
-                break
-            continue
+
+        # Stop as soon as both are known, avoiding fetching further pages.
+        if is_employee and already_in_group:
+            break
 
     return is_employee, already_in_group
 
 
+def _check_user(user: User, lp_canonical, lp_group) -> Tuple[User, str, Any, Optional[str]]:
+    """Checks whether the user needs to be added to the launchpad group.
+
+    This only reads from launchpad, so it is safe to run for several users
+    concurrently.
+
+    :param user: the user to check
+    :param lp_canonical: the launchpad group for Canonical
+    :param lp_group: the launchpad group the user is to be added to
+    :return: a tuple of the user, the action to take for the user (one of
+             ACTION_ADD, ACTION_SKIP or ACTION_FAIL), the launchpad user
+             and the reason for the failure.
+    """
+    try:
+        LOG.info(f"Looking at user {user.name}")
+        if not user.launchpad_id:
+            LOG.warning(f"User {user.name} does not have a launchpad id!")
+            return user, ACTION_FAIL, None, "no launchpad id"
+
+        lp_user = _get_thread_launchpad_client().people[user.launchpad_id]
+
+        if not lp_user.is_valid:
+            LOG.error(f"User '{user.launchpad_id}' is not valid. Skipping")
+            return user, ACTION_FAIL, None, "invalid launchpad user"
+
+        is_employee, in_group = _check_memberships(lp_user, lp_canonical, lp_group)
+
+        if not is_employee:
+            LOG.error(f"User '{user.name}' is not a Canonical employee. Skipping")
+            return user, ACTION_FAIL, None, "not a Canonical employee"
+
+        if in_group:
+            LOG.info(f"User '{user.name}' is already in group '{lp_group.name}'")
+            return user, ACTION_SKIP, lp_user, None
+
+        return user, ACTION_ADD, lp_user, None
+
+    except KeyError:
+        LOG.error(f"Unable to find user '{user.name}' in launchpad. Skipping")
+        return user, ACTION_FAIL, None, "User not in launchpad"
+
+
 @activity.defn
 async def add_users_to_group(group: str, users: Iterable[User]) -> LaunchpadGroupChangeResult:
     """Adds the specified set of users to the group.
 
+    The users are checked concurrently, while the changes to the group
+    membership are made one at a time.
+
     :param group: the name of the group to add the users to
     :param users: an Iterable of the users to add to the group
     :return: a Dict where the key is the userid and the value is a bool indicating
@@ -110,40 +218,23 @@ async def add_users_to_group(group: str, users: Iterable[User]) -> LaunchpadGrou
     result = LaunchpadGroupChangeResult(group=group)
 
     lp_group = launchpad.people[group]
-    lp_canonical = launchpad.people["canonical"]
-    for user in users:
-        try:
-            LOG.info(f"Looking at user {user.name}")
-            if not user.launchpad_id:
-                LOG.warning(f"User {user.name} does not have a launchpad id!")
-                result.add_failure(user, "no launchpad id")
-                continue
-
-            lp_user = launchpad.people[user.launchpad_id]
-
-            if not lp_user.is_valid:
-                LOG.error(f"User '{user.launchpad_id}' is not valid. Skipping")
-                result.add_failure(user, "invalid launchpad user")
-                continue
-
-            is_employee, in_group = _check_memberships(lp_user, lp_canonical, lp_group)
-
-            if not is_employee:
-                LOG.error(f"User '{user.name}' is not a Canonical employee. Skipping")
-                result.add_failure(user, "not a Canonical employee")
-                continue
-
-            if in_group:
-                LOG.info(f"User '{user.name}' is already in group '{group}'")
-                result.add_success(user)
-                continue
+    lp_canonical = _get_canonical_group()
+
+    executor = _get_executor()
+    checks = [
+        asyncio.wrap_future(executor.submit(_check_user, user, lp_canonical, lp_group))
+        for user in users
+    ]
+    for check in asyncio.as_completed(checks):
+        user, action, lp_user, reason = await check
+        if action == ACTION_FAIL:
+            result.add_failure(user, reason)
+            continue
 
+        if action == ACTION_ADD:
             LOG.info(f"Adding user '{user.name}' to group '{group}'")
             lp_group.addMember(person=lp_user, status="Approved")
-            result.add_success(user)
 
-        except KeyError:
-            LOG.error(f"Unable to find user '{user.name}' in launchpad. Skipping")
-            result.add_failure(user, "User not in launchpad")
+        result.add_success(user)
 
     return result
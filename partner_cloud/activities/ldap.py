@@ -17,17 +17,19 @@
 
 """Activities for resolving user information."""
 
-import textwrap
-from typing import Iterable, Set
+import functools
+import itertools
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from temporalio import activity, workflow
-from collections import defaultdict
+from temporalio.exceptions import ApplicationError
 
 with workflow.unsafe.imports_passed_through():
     import partner_cloud.conf
     from oslo_log import log as logging
     from pydantic import BaseModel
     from partner_cloud.objects import User
-    from ldap3 import Server, Connection, SCHEMA
+    from ldap3 import Server, Connection, NONE, RESTARTABLE
     from ldap3.core.exceptions import LDAPException
 
 
@@ -40,6 +42,19 @@ ATTR_MAIL = 'mail'
 
 LDAP_ATTRIBUTES = [ATTR_CN, ATTR_LAUNCHPAD_ID, ATTR_MAIL]
 
+# The number of entries to request from the ldap server per page of results.
+SEARCH_PAGE_SIZE = 500
+
+# A directory entry for a user, mapping each of the LDAP_ATTRIBUTES to its value.
+DirectoryEntry = Dict[str, Optional[str]]
+
+# The number of seconds a directory entry is cached for before it is
+# queried from the ldap server again.
+ENTRY_CACHE_TTL = 300
+
+# Cache of (attribute, value) -> (time cached, entry) for directory entries.
+_entry_cache: Dict[Tuple[str, str], Tuple[float, DirectoryEntry]] = {}
+
 
 def get_identity_attribute(user: User) -> str:
     """Returns the name of the ldap attribute to use as the user identity.
@@ -56,6 +71,33 @@ def get_identity_attribute(user: User) -> str:
     return "cn"
 
 
+def get_identity_value(user: User) -> str:
+    """Returns the value of the user's identity attribute.
+
+    :param user: the User to get the identifying value
+    :return: the value matching the attribute from get_identity_attribute
+    """
+    if user.email is not None:
+        return user.email
+
+    if user.launchpad_id is not None:
+        return user.launchpad_id
+
+    return user.name
+
+
+def get_identity_key(user: User) -> str:
+    """Returns the key identifying the user in the results of resolve_users.
+
+    The key is made of the identity attribute and its value, in the form of
+    "<attribute>=<value>", so users sharing a name are kept apart.
+
+    :param user: the User to get the identifying key
+    :return: the identifying key
+    """
+    return f"{get_identity_attribute(user)}={get_identity_value(user)}"
+
+
 def get_filter_parameter(user: User) -> str:
     """Return a search filter parameter for an ldap query.
 
@@ -94,68 +136,201 @@ def is_fully_resolved(user: User) -> bool:
             and user.name is not None)
 
 
+@functools.lru_cache(maxsize=1)
+def _get_ldap_client() -> Connection:
+    """Returns a bound connection to the ldap server.
+
+    The connection is created on first use and reused by subsequent queries.
+    The restartable strategy re-opens the connection if it is dropped by the
+    server. The server schema is not needed and so is never fetched. A failed
+    bind raises an exception, so that the unbound connection is not reused.
+
+    :return: the bound ldap Connection
+    """
+    ldap_server = Server(CONF.ldap.server, port=CONF.ldap.port, use_ssl=CONF.ldap.use_tls,
+                         get_info=NONE)
+    client = Connection(ldap_server, CONF.ldap.bind_dn, CONF.ldap.password,
+                        client_strategy=RESTARTABLE)
+    if not client.bind():
+        raise LDAPException(f"Failed to bind to the LDAP server {CONF.ldap.server}: "
+                            f"{client.result}")
+
+    return client
+
+
+def _get_cached_entry(attr: str, value: str) -> Optional[DirectoryEntry]:
+    """Returns the cached directory entry matching the attribute value.
+
+    :param attr: the ldap attribute to match
+    :param value: the value of the attribute
+    :return: the cached entry, or None if there is no unexpired entry cached.
+    """
+    cached = _entry_cache.get((attr, value))
+    if cached is None:
+        return None
+
+    cached_at, entry = cached
+    if time.monotonic() - cached_at > ENTRY_CACHE_TTL:
+        del _entry_cache[(attr, value)]
+        return None
+
+    return entry
+
+
+def _cache_entry(entry: DirectoryEntry) -> None:
+    """Caches the directory entry under each of its identifying attributes.
+
+    The cache is kept in the order the entries were cached, so the entries
+    which have expired are pruned from the front of it.
+
+    :param entry: the entry to cache
+    """
+    now = time.monotonic()
+    expired = [key for key, _ in itertools.takewhile(
+        lambda item: now - item[1][0] > ENTRY_CACHE_TTL, _entry_cache.items())]
+    for key in expired:
+        del _entry_cache[key]
+
+    for attr in LDAP_ATTRIBUTES:
+        value = entry[attr]
+        if value is not None:
+            # Remove any previous entry so the new one moves to the end.
+            _entry_cache.pop((attr, value), None)
+            _entry_cache[(attr, value)] = (now, entry)
+
+
+def _first_value(value: Any) -> Optional[str]:
+    """Returns the first value of a possibly multi-valued ldap attribute.
+
+    :param value: the attribute value(s) returned by the ldap server
+    :return: the first value, or None if the attribute has no value.
+    """
+    if isinstance(value, list):
+        return value[0] if value else None
+
+    return value
+
+
+def _search_entries(users: Iterable[User]) -> Iterator[DirectoryEntry]:
+    """Queries the ldap server for the directory entries of the users.
+
+    The results are requested a page at a time so that large queries do not
+    exceed the server's size limit, and are yielded as they arrive. The entries
+    found are added to the entry cache. Users which are not found are left to
+    the caller to report.
+
+    :param users: the Users to query
+    :return: an Iterator of the entries found.
+    """
+    client = _get_ldap_client()
+
+    # The same user may be listed more than once, only query for it once.
+    filter_parameters = sorted(set(map(get_filter_parameter, users)))
+
+    search_filter = f"(&(|{''.join(filter_parameters)})(objectclass=person))"
+
+    results = client.extend.standard.paged_search(
+        CONF.ldap.search_base, search_filter, attributes=LDAP_ATTRIBUTES,
+        paged_size=SEARCH_PAGE_SIZE, generator=True,
+    )
+
+    for result in results:
+        if result.get("type") != "searchResEntry":
+            continue
+
+        attributes = result["attributes"]
+        entry = {attr: _first_value(attributes.get(attr)) for attr in LDAP_ATTRIBUTES}
+        _cache_entry(entry)
+        yield entry
+
+
+def _partition_cached(users: Iterable[User]) -> Tuple[List[DirectoryEntry], List[User]]:
+    """Splits the users into those with a cached directory entry and the rest.
+
+    :param users: the Users to look up in the entry cache
+    :return: a tuple of the cached entries found and the Users not cached.
+    """
+    entries = []
+    uncached = []
+    for user in users:
+        if entry := _get_cached_entry(get_identity_attribute(user), get_identity_value(user)):
+            entries.append(entry)
+        else:
+            uncached.append(user)
+
+    return entries, uncached
+
+
+def _index_entries(entries: Iterable[DirectoryEntry]) -> Dict[str, Dict[str, DirectoryEntry]]:
+    """Indexes the directory entries by each of their identifying attributes.
+
+    :param entries: the entries to index
+    :return: a mapping of each of the LDAP_ATTRIBUTES to a flat mapping of the
+             attribute's values to their entries.
+    """
+    by_cn: Dict[str, DirectoryEntry] = {}
+    by_mail: Dict[str, DirectoryEntry] = {}
+    by_lp: Dict[str, DirectoryEntry] = {}
+    for entry in entries:
+        by_cn[entry[ATTR_CN]] = entry
+        by_mail[entry[ATTR_MAIL]] = entry
+        by_lp[entry[ATTR_LAUNCHPAD_ID]] = entry
+
+    return {ATTR_CN: by_cn, ATTR_MAIL: by_mail, ATTR_LAUNCHPAD_ID: by_lp}
+
+
 @activity.defn
-async def resolve_users(users: Iterable[User]) -> Set[User]:
-    """Returns the iterable of users provided, updated with email and launchpad.
+async def resolve_users(users: Iterable[User]) -> Dict[str, User]:
+    """Returns the users provided, updated with email and launchpad.
 
     Updates the users provided with missing information such as launchpad id and
-    email address.
+    email address. The users of several resources can be resolved together,
+    using the returned mapping to find the updated user for each of them.
 
     :param users: the Users to resolve
-    :return: an Iterable containing the updated users.
+    :return: a mapping of the identity key of each user provided, as returned
+             by get_identity_key, to the updated user.
     """
     if not users:
         LOG.info("No users to resolve.")
-        return set()
+        return {}
 
-    if all(map(is_fully_resolved, users)):
+    # Users which are already fully resolved do not need to be queried.
+    already = [u for u in users if is_fully_resolved(u)]
+    need = [u for u in users if not is_fully_resolved(u)]
+    if not need:
         LOG.info("All users are fully resolved, no need to do anything")
-        return set(users)
+        return {get_identity_key(u): u for u in already}
+
+    # Users looked up recently are served from the cache without a query.
+    entries, uncached = _partition_cached(need)
 
-    ldap_server = Server(CONF.ldap.server, port=CONF.ldap.port, use_ssl=CONF.ldap.use_tls,
-                         get_info=SCHEMA)
     try:
-        client = Connection(ldap_server, CONF.ldap.bind_dn, CONF.ldap.password)
-        client.bind()
-
-        filter_parameters = [get_filter_parameter(u) for u in users]
-
-        search_filter = textwrap.dedent(f"""
-            (&
-                (|
-                    {''.join(filter_parameters)}
-                )
-                (objectclass=person)
-            )
-        """).strip()
-
-        if not client.search(CONF.ldap.search_base, search_filter,
-                             attributes=[ATTR_CN, ATTR_LAUNCHPAD_ID, ATTR_MAIL]):
-            msg = ("No search results matched query with search base = "
-                   f"'{CONF.ldap.search_base}' and search filter = {search_filter}")
-            LOG.error(msg)
-            # TODO(wolsen) get a real exception
-            raise Exception(msg)
-
-        results_map = defaultdict(dict)
-        for entry in client.entries:
-            results_map[ATTR_CN][entry.cn.value] = entry
-            results_map[ATTR_MAIL][entry.mail.value] = entry
-            results_map[ATTR_LAUNCHPAD_ID][entry.launchpadId.value] = entry
-
-        resolved_users: Set[User] = set()
-        for user in users:
-            if attr := get_identity_attribute(user) == ATTR_MAIL:
-                result = results_map[ATTR_MAIL].get(user.email)
-            elif attr == ATTR_LAUNCHPAD_ID:
-                result = results_map[ATTR_LAUNCHPAD_ID].get(user.launchpad_id)
-            else:
-                result = results_map[ATTR_CN].get(user.name)
-
-            resolved_users.add(User(
-                name=result.cn.value, email=result.mail.value,
-                launchpad_id=result.launchpadId.value
-            ))
+        if uncached:
+            entries = itertools.chain(entries, _search_entries(uncached))
+
+        lookup = _index_entries(entries)
+
+        results: List[DirectoryEntry] = []
+        for user in need:
+            attr = get_identity_attribute(user)
+            result = lookup[attr].get(get_identity_value(user))
+
+            if result is None:
+                msg = f"Unable to find user {user.name} with {attr} in LDAP server."
+                LOG.error(msg)
+                # Retrying will not find a user which is not in the directory.
+                raise ApplicationError(msg, non_retryable=True)
+
+            results.append(result)
+
+        # The values come straight from the directory, so skip validating them.
+        resolved_users: Dict[str, User] = {
+            get_identity_key(user): User.model_construct(
+                name=e[ATTR_CN], email=e[ATTR_MAIL], launchpad_id=e[ATTR_LAUNCHPAD_ID])
+            for user, e in zip(need, results)
+        }
+        resolved_users.update((get_identity_key(u), u) for u in already)
 
         return resolved_users
     except LDAPException as e:
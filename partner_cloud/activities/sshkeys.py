@@ -18,7 +18,8 @@
 """Activities for managing SSH Keys."""
 
 import asyncio
-from typing import Dict, Iterable
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from temporalio import activity, workflow
 
@@ -31,34 +32,108 @@ with workflow.unsafe.imports_passed_through():
 LOG = logging.getLogger(__name__)
 CONF = partner_cloud.conf.CONF
 
+# ssh-import-id reports the user it failed to import keys for as "user=<id>".
+FAILED_USER_RE = re.compile(r"user=(\S+)")
 
-@activity.defn
-async def ssh_import_id(launchpad_ids: Iterable[str]) -> Dict[str, int]:
-    """Imports the SSH keys of the specified launchpad users to the local machine.
 
-    :param launchpad_ids: a Set of strings containing launchpad ids.
-    :returns: a mapping of the launchpad ID to a bool value indicating whether
-              the ssh keys were successfully imported for the user.
+def _find_failed_id(launchpad_ids: List[str], stderr: bytes) -> Optional[str]:
+    """Finds the launchpad id ssh-import-id failed to import keys for.
+
+    :param launchpad_ids: the launchpad ids passed to ssh-import-id.
+    :param stderr: the stderr output of ssh-import-id.
+    :returns: the launchpad id which failed, or None if it cannot be determined.
     """
-    results = dict()
+    for match in FAILED_USER_RE.finditer(stderr.decode(errors="replace")):
+        if match.group(1) in launchpad_ids:
+            return match.group(1)
+
+    return None
+
 
-    # Note: the ssh-import-id does take multiple user ids as a parameter, however
-    # it stops processing after the first failure. As such, when an attempt to import
-    # ssh keys fails before the last of the users then its unclear how many were
-    # imported. Thus, each key is imported one-by-one in order to import as many
-    # ssh keys as possible and only fail for some if there is indeed a failure.
-    for lpid in launchpad_ids:
-        cmd = ["ssh-import-id", f"lp:{lpid}"]
+async def _run_import(launchpad_ids: List[str], sem: asyncio.Semaphore) -> Tuple[int, bytes]:
+    """Runs ssh-import-id for the launchpad users.
+
+    :param launchpad_ids: the launchpad ids of the users to import keys for.
+    :param sem: semaphore bounding the number of concurrent imports.
+    :returns: a tuple of the return code and stderr output of ssh-import-id.
+    """
+    cmd = ["ssh-import-id", *(f"lp:{lpid}" for lpid in launchpad_ids)]
+    async with sem:
         LOG.debug(f"Issuing command: {' '.join(cmd)}")
         process = await asyncio.create_subprocess_exec(
             *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
         )
+        # Use communicate() rather than wait() so that a full pipe buffer
+        # cannot deadlock the process.
+        stdout, stderr = await process.communicate()
+
+    if process.returncode != 0:
+        LOG.debug(f"{' '.join(cmd)} failed. stdout = {stdout}, "
+                  f"stderr={stderr}")
+
+    return process.returncode, stderr
+
 
-        await process.wait()
-        if process.returncode != 0:
-            LOG.debug(f"{' '.join(cmd)} failed. stdout = {process.stdout}, "
-                      f"stderr={process.stderr}")
+async def _import_batch(launchpad_ids: List[str], sem: asyncio.Semaphore) -> Dict[str, bool]:
+    """Imports the SSH keys of a batch of launchpad users.
 
-        results[lpid] = process.returncode == 0
+    :param launchpad_ids: the launchpad ids of the users to import keys for.
+    :param sem: semaphore bounding the number of concurrent imports.
+    :returns: a mapping of the launchpad ID to a bool value indicating whether
+              the ssh keys were successfully imported for the user.
+    """
+    results = dict()
+
+    # Note: ssh-import-id stops processing after the first failure, so when it
+    # fails the users before the failed one have been imported, the failed user is
+    # marked as such and the remaining users are imported with another call.
+    while launchpad_ids:
+        returncode, stderr = await _run_import(launchpad_ids, sem)
+        if returncode == 0:
+            results.update(dict.fromkeys(launchpad_ids, True))
+            break
+
+        if len(launchpad_ids) == 1:
+            results[launchpad_ids[0]] = False
+            break
+
+        failed = _find_failed_id(launchpad_ids, stderr)
+        if failed is None:
+            # It is unclear how many were imported, so import each one by one in
+            # order to import as many ssh keys as possible.
+            for result in await asyncio.gather(
+                *[_import_batch([lpid], sem) for lpid in launchpad_ids]
+            ):
+                results.update(result)
+            break
+
+        index = launchpad_ids.index(failed)
+        results.update(dict.fromkeys(launchpad_ids[:index], True))
+        results[failed] = False
+        launchpad_ids = launchpad_ids[index + 1:]
+
+    return results
+
+
+@activity.defn
+async def ssh_import_id(launchpad_ids: Iterable[str]) -> Dict[str, int]:
+    """Imports the SSH keys of the specified launchpad users to the local machine.
+
+    :param launchpad_ids: a Set of strings containing launchpad ids.
+    :returns: a mapping of the launchpad ID to a bool value indicating whether
+              the ssh keys were successfully imported for the user.
+    """
+    # The users are split into a batch per concurrent ssh-import-id process, each
+    # of which imports the keys for all the users in its batch.
+    max_concurrency = CONF.sshkeys.max_concurrency or 8
+    launchpad_ids = list(launchpad_ids)
+    batches = [launchpad_ids[i::max_concurrency] for i in range(max_concurrency)]
+
+    sem = asyncio.Semaphore(max_concurrency)
+    results = dict()
+    for result in await asyncio.gather(
+        *[_import_batch(batch, sem) for batch in batches if batch]
+    ):
+        results.update(result)
 
     return results
@@ -17,7 +17,7 @@
 
 from oslo_config import cfg
 
-from partner_cloud.conf import cloud, jira, launchpad, ldap, temporal
+from partner_cloud.conf import cloud, jira, launchpad, ldap, sshkeys, temporal
 
 CONF = cfg.CONF
 
@@ -25,4 +25,5 @@ cloud.register_opts(CONF)
 jira.register_opts(CONF)
 launchpad.register_opts(CONF)
 ldap.register_opts(CONF)
+sshkeys.register_opts(CONF)
 temporal.register_opts(CONF)
@@ -0,0 +1,45 @@
+#
+# Copyright (C) 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""Config options for importing ssh keys."""
+
+from oslo_config import cfg
+
+sshkeys_group = cfg.OptGroup(
+    "sshkeys",
+    title="SSH Key Import Options",
+    help="""Options under this group are used to control how ssh keys
+            are imported onto the local machine.""",
+)
+
+opts = [
+    cfg.IntOpt(
+        "max_concurrency",
+        default=8,
+        min=1,
+        help="The maximum number of ssh-import-id processes to run concurrently.",
+    ),
+]
+
+
+def register_opts(conf: cfg.CONF):
+    """Register configuration options.
+
+    :param conf: configuration option manager
+    """
+    conf.register_group(sshkeys_group)
+    conf.register_opts(opts, group=sshkeys_group)
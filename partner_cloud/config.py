@@ -16,7 +16,7 @@
 #
 
 """Configuration definition and parsing."""
-from typing import List
+from typing import Any, Dict, List, Optional, Set
 
 from oslo_config import cfg
 from oslo_log import log
@@ -29,6 +29,15 @@ CONF = partner_cloud.conf.CONF
 
 LOG = log.getLogger(__name__)
 
+# Whether the command line arguments have been parsed.
+_args_parsed = False
+
+# The names of the clouds whose configuration sections have been registered.
+_registered_clouds: Set[str] = set()
+
+# Cache of cloud name -> cloud configuration section, built on first lookup.
+_cloud_configs: Dict[str, Any] = {}
+
 
 def parse_args(argv: List[str], default_config_files: str = None):
     """Parse command line arguments to load the configuration.
@@ -36,15 +45,42 @@ def parse_args(argv: List[str], default_config_files: str = None):
     :param argv: list of arguments to parse.
     :param default_config_files: Path to a configuration file to use.
     """
-    log.register_options(CONF)
+    global _args_parsed
 
-    CONF(
-        argv[1:],
-        project="partner_cloud",
-        version=version.version_string(),
-    )
+    # The arguments only need parsing once. oslo.config also refuses to
+    # register the logging CLI options once the arguments have been parsed.
+    if not _args_parsed:
+        log.register_options(CONF)
 
-    # Dynamic cloud sections calls for this bit here.
+        CONF(
+            argv[1:],
+            project="partner_cloud",
+            version=version.version_string(),
+        )
+        _args_parsed = True
+
+    # Dynamic cloud sections calls for this bit here. Clouds registered by a
+    # previous call do not need registering again.
     for cloud in CONF.clouds:
+        if cloud in _registered_clouds:
+            continue
         CONF.register_group(cfg.OptGroup(cloud, dynamic_group_owner="clouds"))
         CONF.register_opts(cloud_opts, cloud)
+        _registered_clouds.add(cloud)
+
+    _cloud_configs.clear()
+
+
+def get_cloud_config(name: str) -> Optional[Any]:
+    """Returns the configuration section for the cloud with the given name.
+
+    :param name: the name of the cloud, as configured in its section.
+    :return: the configuration section of the cloud, or None if there is no
+             cloud configured with the name.
+    """
+    if not _cloud_configs:
+        for cloud in CONF.clouds:
+            cloud_config = CONF.get(cloud)
+            _cloud_configs[cloud_config.name] = cloud_config
+
+    return _cloud_configs.get(name)
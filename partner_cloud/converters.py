@@ -18,14 +18,15 @@
 """Data converter using Pydantic JSON conversion."""
 
 import json
-from pydantic_core import to_jsonable_python
 from temporalio import workflow
-from typing import Any, Optional, Type
+from typing import Any, Dict, List, Optional, Sequence, Type
 from temporalio.api.common.v1 import Payload
+from temporalio.common import RawValue
 from temporalio.converter import (
     CompositePayloadConverter,
     DataConverter,
     DefaultPayloadConverter,
+    EncodingPayloadConverter,
     JSONPlainPayloadConverter,
 )
 
@@ -40,8 +41,9 @@ class PydanticJSONPayloadConverter(JSONPlainPayloadConverter):
     pydantic objects to json as well.
 
     Note: this is taken from the temporal.io python examples, however
-    it has been updated to use the to_jsonable_python which is the
-    preferred method for pydantic 2.
+    it has been updated to serialize pydantic objects directly to JSON
+    bytes with the pydantic-core serializer, which is the preferred
+    method for pydantic 2.
     """
 
     def to_payload(self, value: Any) -> Optional[Payload]:
@@ -53,25 +55,60 @@ class PydanticJSONPayloadConverter(JSONPlainPayloadConverter):
         """
         # We let JSON conversion errors be thrown to caller
         if isinstance(value, BaseModel):
-            return super().to_payload(to_jsonable_python(value))
+            # Serialize straight to JSON bytes rather than converting to python
+            # objects first and then having the json module encode those.
+            return Payload(
+                metadata={"encoding": self.encoding.encode()},
+                data=value.__pydantic_serializer__.to_json(value, by_alias=True),
+            )
         else:
             return super().to_payload(value)
 
 
+# The default payload converters with the JSON converter replaced by the Pydantic
+# one. The converters are stateless, so the same instances are shared by every
+# PydanticPayloadConverter.
+_CONVERTERS = tuple(
+    c
+    if not isinstance(c, JSONPlainPayloadConverter)
+    else PydanticJSONPayloadConverter()
+    for c in DefaultPayloadConverter.default_encoding_payload_converters
+)
+
+
+# Cache of value type -> the converter from _CONVERTERS which converts values of
+# that type, so the chain only needs to be walked for the first value of a type.
+_converters_by_type: Dict[type, EncodingPayloadConverter] = {}
+
+
 class PydanticPayloadConverter(CompositePayloadConverter):
     """Payload converter that replaces Temporal JSON conversion with Pydantic
     JSON conversion.
     """
 
     def __init__(self) -> None:
-        super().__init__(
-            *(
-                c
-                if not isinstance(c, JSONPlainPayloadConverter)
-                else PydanticJSONPayloadConverter()
-                for c in DefaultPayloadConverter.default_encoding_payload_converters
-            )
-        )
+        super().__init__(*_CONVERTERS)
+
+    def to_payloads(self, values: Sequence[Any]) -> List[Payload]:
+        """Convert the values with the first converter that accepts each type.
+
+        The converter that accepts a type is remembered, so later values of the
+        same type go straight to it. Values of other types are converted by the
+        composite converter, which also passes RawValues through unchanged.
+        """
+        payloads = []
+        for value in values:
+            converter = _converters_by_type.get(type(value))
+            payload = converter.to_payload(value) if converter else None
+            if payload is None:
+                payload, = super().to_payloads([value])
+                if not isinstance(value, RawValue):
+                    encoding = payload.metadata["encoding"]
+                    _converters_by_type[type(value)] = self.converters[encoding]
+
+            payloads.append(payload)
+
+        return payloads
 
 
 pydantic_data_converter = DataConverter(
@@ -17,16 +17,44 @@
 
 """Shared objects for various activities and workflows."""
 
-from typing import Optional
-from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 
 class Object(BaseModel):
-    """An Object for Partner Cloud"""
+    """An Object for Partner Cloud.
+
+    Objects are immutable. The hash of objects with a name is computed from
+    their name once, when they are created or copied.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    _hash: Optional[int] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        """Computes the hash of objects with a name."""
+        if 'name' in type(self).model_fields:
+            self._hash = hash(self.name)
+
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None,
+                   deep: bool = False) -> 'Object':
+        """Returns a copy of the object.
+
+        The hash is computed again for the copy, as its name may be updated.
+
+        :param update: the values to change in the copy
+        :param deep: whether to make a deep copy of the object
+        :return: the copy of the object
+        """
+        copied = super().model_copy(update=update, deep=deep)
+        copied.model_post_init(None)
+        return copied
 
     def __hash__(self):
-        if hasattr(self, 'name'):
-            return hash(self.name)
+        """Returns the hash computed from the object's name."""
+        if self._hash is not None:
+            return self._hash
 
         raise TypeError(f"unhashable type: {type(self)}")
 
@@ -41,3 +69,7 @@ class User(Object):
 class Group(Object):
     """A group of users."""
     launchpad_id: Optional[str] = None
+
+    def __hash__(self):
+        """Returns the hash computed from the group's launchpad id."""
+        return hash(self.launchpad_id)
@@ -15,9 +15,9 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 #
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from partner_cloud.objects import Group, Object, User
-from typing import Union
+from typing import Set, Union
 
 
 class Resource(Object):
@@ -28,14 +28,15 @@ class Resource(Object):
 class ResourceAccess(BaseModel):
     """Resource access list."""
     resource: Resource
-    users: Union[User, Group] = []
+    users: Set[Union[User, Group]] = Field(default_factory=set)
 
     def add(self, *users: Union[User, Group]) -> None:
         """Add a user or list of users to access the resource."""
-        for user in users:
-            self.users.append(user)
+        self.users.update(users)
 
     def remove(self, *users: Union[User, Group]) -> None:
-        """Remove the users from the access for the resource."""
-        for user in users:
-            self.users.remove(user)
+        """Remove the users from the access for the resource.
+
+        Users which do not have access to the resource are ignored.
+        """
+        self.users.difference_update(users)
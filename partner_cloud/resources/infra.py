@@ -17,12 +17,17 @@
 
 """Infrastructure resources.."""
 
-from pydantic import BaseModel
-from ipaddress import IPv4Address, IPv6Address
+from pydantic import BaseModel, field_validator
+from ipaddress import ip_address
 from partner_cloud.resources import Resource
-from typing import Union
+from typing import Any
 
 
 class InfraNode(Resource, BaseModel):
     """An infrastructure node for a partner cloud."""
-    ip_address: Union[IPv4Address, IPv6Address]
+    ip_address: str
+
+    @field_validator("ip_address", mode="before")
+    @classmethod
+    def _validate_ip_address(cls, value: Any) -> str:
+        return str(ip_address(value))
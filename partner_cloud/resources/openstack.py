@@ -17,9 +17,10 @@
 
 """OpenStack Resource Definitions."""
 
-from ipaddress import ip_address, IPv4Address, IPv6Address
+from ipaddress import ip_address
 from partner_cloud.resources import Resource
-from typing import Optional, Union
+from pydantic import field_validator
+from typing import Any, Optional
 
 
 class OpenStackProject(Resource):
@@ -32,4 +33,9 @@ class OpenStackBastion(Resource):
     """A bastion instance on a partner cloud."""
     project: OpenStackProject
     instance_id: Optional[str]
-    ip_address: Optional[Union[IPv4Address, IPv6Address]] = None
+    ip_address: Optional[str] = None
+
+    @field_validator("ip_address", mode="before")
+    @classmethod
+    def _validate_ip_address(cls, value: Any) -> Optional[str]:
+        return None if value is None else str(ip_address(value))
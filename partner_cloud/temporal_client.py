@@ -0,0 +1,51 @@
+#
+# Copyright (C) 2023 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+#
+
+"""Shared connections to the Temporal server."""
+
+from typing import Dict, Optional, Tuple
+
+from temporalio.client import Client
+from temporalio.converter import DataConverter
+
+# Cache of (host, port, namespace, data converter id) -> connected client.
+_clients: Dict[Tuple[str, int, str, int], Client] = {}
+
+
+async def get_client(host: str, port: int, namespace: str,
+                     data_converter: Optional[DataConverter] = None) -> Client:
+    """Returns a client connected to the Temporal server.
+
+    Clients are cached, so repeated calls with the same connection details
+    reuse the existing connection rather than connecting again.
+
+    :param host: the host of the Temporal server.
+    :param port: the port of the Temporal server.
+    :param namespace: the namespace to connect to.
+    :param data_converter: the data converter to use, or None for the default.
+    :return: the connected Client.
+    """
+    key = (host, port, namespace, id(data_converter))
+    client = _clients.get(key)
+    if client is None:
+        kwargs = {}
+        if data_converter is not None:
+            kwargs["data_converter"] = data_converter
+        client = await Client.connect(f"{host}:{port}", namespace=namespace, **kwargs)
+        _clients[key] = client
+
+    return client
@@ -20,7 +20,6 @@ import sys
 from typing import List, Optional
 
 from temporalio import workflow
-from temporalio.client import Client
 from temporalio.worker import Worker
 
 import partner_cloud.conf
@@ -30,7 +29,12 @@ from partner_cloud.workflows import grant_access
 # Import activity, passing it through the sandbox without reloading the module
 with workflow.unsafe.imports_passed_through():
     from oslo_log import log as logging
-    from partner_cloud import config
+    from partner_cloud import config, temporal_client
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 
 CONF = partner_cloud.conf.CONF
@@ -47,9 +51,8 @@ async def async_main(argv: Optional[List[str]] = None):
 
     config.parse_args(argv)
     logging.setup(CONF, "partner-cloud")
-    client = await Client.connect(
-        f"{CONF.temporal.host}:{CONF.temporal.port}",
-        namespace=CONF.temporal.namespace,
+    client = await temporal_client.get_client(
+        CONF.temporal.host, CONF.temporal.port, CONF.temporal.namespace,
     )
 
     # Run the worker
@@ -71,4 +74,8 @@ def main(argv: Optional[List[str]] = None):
 
     :param argv: list of CLI arguments.
     """
+    if uvloop is not None:
+        # uvloop is faster than the default event loop, use it when available.
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
     return asyncio.run(async_main(argv))
@@ -20,17 +20,18 @@
 import argparse
 import asyncio
 import sys
+from collections import defaultdict
 from datetime import timedelta
-from typing import List, Dict, Optional, Set, Tuple
+from operator import attrgetter
+from typing import DefaultDict, List, Dict, Optional, Set, Tuple
 
 from temporalio import workflow
-from temporalio.client import Client
 
 with workflow.unsafe.imports_passed_through():
     from oslo_log import log as logging
 
     import partner_cloud.conf
-    from partner_cloud import config
+    from partner_cloud import config, temporal_client
     from partner_cloud.objects import User
     from partner_cloud.resources import Resource
     from partner_cloud.resources.infra import InfraNode
@@ -43,6 +44,20 @@ CONF = partner_cloud.conf.CONF
 LOG = logging.getLogger(__name__)
 TASK_QUEUE = "partner-cloud-access"
 
+# Timeouts for the activities started by the workflow.
+TIMEOUT_JIRA = timedelta(minutes=2)
+TIMEOUT_LDAP = timedelta(minutes=5)
+TIMEOUT_LP = timedelta(minutes=5)
+
+# Returns the launchpad group, from the cloud configuration, which grants
+# access to each type of resource.
+RESOURCE_GROUPS = {
+    # grant infra access
+    InfraNode: attrgetter("infra_group"),
+    # grant project access
+    OpenStackProject: attrgetter("user_group"),
+}
+
 
 @workflow.defn
 class PartnerCloudGrantAccessWorkflow:
@@ -67,68 +82,67 @@ class PartnerCloudGrantAccessWorkflow:
         :param cloud: the name of the partner cloud to grant access
         :return:
         """
-        LOG.info(f"Fetching list of users to grant access to {cloud}")
-
-        cloud_config = None
-        for c in CONF.clouds:
-            LOG.info(f"Looking at cloud {c}")
-            config = CONF.get(c)
-            LOG.info(f"Found config {config}")
-            if config.name == cloud:
-                cloud_config = config
-                break
+        LOG.info("Fetching list of users to grant access to %s", cloud)
 
+        cloud_config = config.get_cloud_config(cloud)
         if not cloud_config:
-            LOG.error(f"Unable to find configuration for cloud {cloud}")
+            LOG.error("Unable to find configuration for cloud %s", cloud)
             raise Exception(f"Unable to find configuration for cloud {cloud}")
-        LOG.info(f"Found cloud_config {cloud_config}")
+        LOG.info("Found cloud_config %s", cloud_config)
 
         access_result = await workflow.execute_activity(
             jira.get_access_for_current_sprint,
             args=[cloud_config.name],
-            start_to_close_timeout=timedelta(minutes=2),
+            start_to_close_timeout=TIMEOUT_JIRA,
         )
         resource_map: Dict[Resource, Set[User]] = access_result.to_map()
 
-        LOG.info(f"Found resource_map: {resource_map}")
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug("Found resource_map: %s", resource_map)
 
         # Resolve all the users to ensure we have updated information
-        # for the user's email address, launchpad id, etc.
-        for resource, users in resource_map.copy().items():
-            LOG.info(f"Resolving users for {resource.name}")
-            resolved_users = await workflow.execute_activity(
+        # for the user's email address, launchpad id, etc. The users of
+        # all resources are resolved together in a single activity.
+        all_users: Set[User] = set().union(*resource_map.values())
+        if all_users:
+            LOG.info("Resolving users %s", all_users)
+            resolved_users: Dict[str, User] = await workflow.execute_activity(
                 ldap.resolve_users,
-                args=[users],
-                start_to_close_timeout=timedelta(minutes=5),
+                args=[all_users],
+                start_to_close_timeout=TIMEOUT_LDAP,
             )
-            resource_map[resource] = resolved_users
-
-        tasks = []
+            resource_map = {
+                resource: {resolved_users[ldap.get_identity_key(u)] for u in users}
+                for resource, users in resource_map.items()
+            }
+
+        # Several resources usually grant access through the same launchpad
+        # group, so the users are combined per group and each group is updated
+        # by a single activity.
+        groups: DefaultDict[str, Set[User]] = defaultdict(set)
         for resource, users in resource_map.items():
             if not users:
-                LOG.info(f"No users need access to {resource}")
+                LOG.info("No users need access to %s", resource.name)
                 continue
 
-            LOG.info(f"Examining resource {resource} ({type(resource)} for users: {users}")
-            if isinstance(resource, InfraNode):
-                # grant infra access
-                LOG.info(f"Starting activity to add users {users} to launchpad "
-                         f"group {cloud_config.infra_group}")
-                tasks.append(asyncio.create_task(workflow.execute_activity(
-                    launchpad.add_users_to_group,
-                    args=[cloud_config.infra_group, users],
-                    start_to_close_timeout=timedelta(minutes=5),
-                )))
-
-            if isinstance(resource, OpenStackProject):
-                # grant project access
-                LOG.info(f"Starting activity to add users {users} to launchpad "
-                         f"group {cloud_config.user_group}")
-                tasks.append(asyncio.create_task(workflow.execute_activity(
-                    launchpad.add_users_to_group,
-                    args=[cloud_config.user_group, users],
-                    start_to_close_timeout=timedelta(minutes=5)
-                )))
+            LOG.info("Examining resource %s (%s) for users: %s",
+                     resource, type(resource).__name__, users)
+            get_group = RESOURCE_GROUPS.get(type(resource))
+            if get_group is None:
+                LOG.warning("Unable to grant access to resource %s of type %s",
+                            resource.name, type(resource).__name__)
+                continue
+
+            groups[get_group(cloud_config)] |= users
+
+        tasks = []
+        for group, users in groups.items():
+            LOG.info("Starting activity to add users %s to launchpad group %s", users, group)
+            tasks.append(asyncio.create_task(workflow.execute_activity(
+                launchpad.add_users_to_group,
+                args=[group, users],
+                start_to_close_timeout=TIMEOUT_LP,
+            )))
 
         if tasks:
             await asyncio.wait(tasks)
@@ -161,8 +175,8 @@ async def async_main(argv: Optional[List[str]] = None):
     config.parse_args(args)
 
     # Create client connected to server at the given address.
-    client = await Client.connect(
-        f"{CONF.temporal.host}:{CONF.temporal.port}", namespace=CONF.temporal.namespace,
+    client = await temporal_client.get_client(
+        CONF.temporal.host, CONF.temporal.port, CONF.temporal.namespace,
         data_converter=pydantic_data_converter,
     )
 